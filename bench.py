@@ -0,0 +1,211 @@
+"""端到端基准测试
+
+启动本地模拟服务器（mock_server.py），把idx.py的所有地址指向它，
+重复执行完整流程并统计每个阶段耗时的p50/p90/p99/最大值。
+
+场景:
+  cold    每次使用空cookie文件：探测失败 -> 浏览器UI登录 -> 进入工作站
+  http    保留Google登录会话但删除工作站JWT：探测失败 -> HTTP会话刷新（不启动浏览器）
+  cookie  同http，但关闭HTTP会话刷新：探测失败 -> 浏览器cookie直接访问 -> 进入工作站
+  probe   保留完整cookie：只执行协议探测
+  profile 同cookie，但使用持久Firefox配置目录：每轮先清空配置目录执行一次（cold），
+          再用保留了HTTP缓存的配置目录执行一次（warm），对比工作站IDE的加载耗时
+  startup 以子进程运行`python idx.py --once`（探测成功路径），测量启动到退出的耗时和峰值内存，
+          并与预先导入playwright/requests的情况对比
+
+示例: python bench.py --scenario cold --runs 5 --ide-delay 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import mock_server
+
+# 报告中的阶段顺序，对应idx.py中记录的span名称
+PHASES = [
+    "probe",
+    "http_refresh",
+    "run",
+    "browser_launch",
+    "context",
+    "direct",
+    "ui_login",
+    "login_landing",
+    "login_get_started",
+    "login_account_chooser",
+    "login_email",
+    "login_password",
+    "login_post_login",
+    "login_workspace_list",
+    "navigate",
+    "workspace",
+    "save",
+]
+SCENARIOS = ["cold", "http", "cookie", "probe", "profile", "startup"]
+PROFILE_MODES = ["cold", "warm"]
+# startup场景的对照组：启动时即导入重量级依赖，相当于延迟导入之前的行为
+EAGER_STARTUP = (
+    "import sys, runpy; import playwright.async_api, requests; "
+    "sys.argv = [sys.argv[1], '--once']; runpy.run_path(sys.argv[0], run_name='__main__')"
+)
+
+def percentile(values, q):
+    """最近秩法计算百分位数"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, int(round(q / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def collect(trace, timings, suffix=""):
+    """把一次执行的阶段计时追加到timings[阶段名+suffix]，同一阶段多次执行（重试）时累加"""
+    for name, (duration, count, failures) in trace.phase_totals().items():
+        timings[name + suffix].append(duration)
+    timings["total" + suffix].append(trace.duration)
+
+def prepare_cookies(idx, scenario, cookie_file, seed_file):
+    """按场景准备本次执行使用的cookie文件"""
+    if scenario == "cold" or not os.path.exists(seed_file):
+        state = idx.empty_storage_state()
+    else:
+        with open(seed_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if scenario in ("http", "cookie", "profile"):
+            state["cookies"] = [c for c in state.get("cookies", []) if c.get("name") != "WorkstationJwtPartitioned"]
+    idx.get_cookie_store(cookie_file).save(state)
+
+async def bench(args, idx, server):
+    timings = defaultdict(list)
+
+    work_dir = tempfile.mkdtemp(prefix="idx-bench-")
+    cookie_file = os.path.join(work_dir, "cookie.json")
+    seed_file = os.path.join(work_dir, "seed.json")
+    idx.cookies_path = cookie_file
+    # 等待历史和选择器统计默认也放在临时目录，每次基准测试都从冷启动开始学习
+    os.environ.setdefault("IDX_WAIT_HISTORY_FILE", os.path.join(work_dir, "wait-history.json"))
+    os.environ.setdefault("IDX_SELECTOR_STATS_FILE", os.path.join(work_dir, "selector-stats.json"))
+    failures = 0
+
+    try:
+        # 非cold场景需要先完成一次登录，得到可复用的cookie
+        if args.scenario != "cold":
+            prepare_cookies(idx, "cold", cookie_file, seed_file)
+            await idx.main(notify=False)
+            shutil.copyfile(cookie_file, seed_file)
+        if args.scenario in ("cookie", "profile"):
+            os.environ["IDX_HTTP_REFRESH"] = "0"
+        modes = [""]
+        if args.scenario == "profile":
+            profile_dir = os.path.join(work_dir, "profiles")
+            os.environ.update({"IDX_PERSISTENT_PROFILE": "1", "IDX_PROFILE_DIR": profile_dir})
+            modes = PROFILE_MODES
+
+        for index in range(args.runs):
+            for mode in modes:
+                if mode == "cold":
+                    shutil.rmtree(profile_dir, ignore_errors=True)
+                prepare_cookies(idx, args.scenario, cookie_file, seed_file)
+                idx.get_event_log().clear()
+                await idx.main(notify=False)
+                trace = idx.get_run_trace()
+                collect(trace, timings, f"_{mode}" if mode else "")
+                failures += 0 if trace.success else 1
+                print(f"[bench] 第{index + 1}/{args.runs}次{mode}: {trace.duration:.2f}s 路径={trace.path} "
+                      f"重试={trace.retries} {'成功' if trace.success else '失败'}", flush=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return timings, failures
+
+def bench_startup(args, server):
+    """测量探测成功路径下单次执行进程的耗时（秒）和峰值内存（MB）"""
+    work_dir = tempfile.mkdtemp(prefix="idx-startup-")
+    state = {"cookies": [{
+        "name": mock_server.JWT_COOKIE, "value": mock_server.make_mock_jwt(86400), "domain": "localhost",
+        "path": "/", "expires": -1, "httpOnly": False, "secure": False, "sameSite": "Lax",
+    }], "origins": []}
+    with open(os.path.join(work_dir, "cookie.json"), "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "idx.py")
+    commands = {
+        "lazy": [sys.executable, script, "--once"],
+        "eager": [sys.executable, "-c", EAGER_STARTUP, script],
+    }
+    timings = defaultdict(list)
+    failures = 0
+    try:
+        for mode, command in commands.items():
+            for index in range(args.runs):
+                start = time.perf_counter()
+                process = subprocess.Popen(command, cwd=work_dir, stdout=subprocess.DEVNULL,
+                                           stderr=subprocess.DEVNULL)
+                _, status, usage = os.wait4(process.pid, 0)
+                process.returncode = os.waitstatus_to_exitcode(status)
+                timings[f"{mode}_seconds"].append(time.perf_counter() - start)
+                # Linux下ru_maxrss的单位为KB
+                timings[f"{mode}_rss_mb"].append(usage.ru_maxrss / 1024)
+                failures += 1 if process.returncode else 0
+                print(f"[bench] {mode} 第{index + 1}/{args.runs}次: {timings[f'{mode}_seconds'][-1]:.2f}s "
+                      f"{timings[f'{mode}_rss_mb'][-1]:.1f}MB", flush=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return timings, failures
+
+def print_report(args, timings, failures, request_counts):
+    print()
+    print(f"场景: {args.scenario}  执行次数: {args.runs}  失败: {failures}")
+    print(f"{'阶段':<36}{'次数':>6}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    names = PHASES + ["total"]
+    if args.scenario == "profile":
+        names = [f"{name}_{mode}" for name in names for mode in PROFILE_MODES]
+    if args.scenario == "startup":
+        names = ["lazy_seconds", "eager_seconds", "lazy_rss_mb", "eager_rss_mb"]
+    for name in names:
+        values = timings.get(name)
+        if not values:
+            continue
+        row = [percentile(values, q) for q in (50, 90, 99)] + [max(values)]
+        print(f"{name:<36}{len(values):>6}" + "".join(f"{v:>9.2f}" for v in row))
+    print()
+    print("模拟服务器请求数: " + ", ".join(f"{path}={count}" for path, count in sorted(request_counts.items())))
+
+def main():
+    parser = argparse.ArgumentParser(description="idx.py端到端基准测试（使用本地模拟服务器）")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="cold", help="测试场景")
+    parser.add_argument("--runs", type=int, default=5, help="执行次数")
+    parser.add_argument("--json", dest="json_path", help="把原始耗时写入JSON文件")
+    mock_server.add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = mock_server.MockIdxServer(mock_server.config_from_args(args)).start()
+    os.environ.update(server.env())
+    os.environ.update({"IDX_EMAIL": "bench@example.com", "IDX_PASSWORD": "bench-password"})
+    # 基准测试不推送Telegram通知
+    os.environ["TG_TOKEN"] = ""
+
+    try:
+        if args.scenario == "startup":
+            timings, failures = bench_startup(args, server)
+        else:
+            # 环境变量设置完成后再导入，使模块级地址配置指向模拟服务器
+            import idx
+            timings, failures = asyncio.run(bench(args, idx, server))
+    finally:
+        server.stop()
+
+    print_report(args, timings, failures, server.request_counts)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"scenario": args.scenario, "runs": args.runs, "failures": failures,
+                       "timings": timings}, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
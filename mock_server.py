@@ -0,0 +1,393 @@
+"""本地模拟的IDX / Google账号 / 云工作站服务器
+
+用于在没有真实Google服务的情况下运行idx.py的完整流程和基准测试：
+- /                      模拟idx.google.com首页（未登录显示Get Started，已登录显示工作区图标）
+- /new                   Get Started跳转，未登录时重定向到账号登录页
+- /accounts/...          模拟accounts.google.com的邮箱、密码两步登录
+- /workspace/            模拟工作站（Code-OSS），延迟出现侧边栏codicon元素；
+                         JWT无效时重定向到/accounts/ServiceLogin，已登录Google时签发票据，
+                         再由/workspace/_auth换成新的WorkstationJwtPartitioned
+- /static/...            工作区图标和IDE静态资源
+
+工作站使用localhost访问，IDX和账号页面使用127.0.0.1访问，两者的cookie互不可见，
+与真实环境中google.com和cloudworkstations.dev的隔离一致。
+支持配置每个请求的延迟、IDE就绪时间，以及随机失败、图标缺失等故障注入。
+单独运行: python mock_server.py --port 8765 --ide-delay 10
+"""
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, quote, urlparse
+
+SESSION_COOKIE = "SID"
+SESSION_VALUE = "mock-session"
+JWT_COOKIE = "WorkstationJwtPartitioned"
+MOCK_CLUSTER = "1700000000000.cluster-mock.cloudworkstations.dev"
+
+# 1x1透明PNG，作为工作区图标
+ICON_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+@dataclass
+class MockConfig:
+    """模拟服务器的延迟和故障注入配置"""
+    latency: float = 0.05  # 每个请求的基础延迟（秒）
+    login_delay: float = 0.5  # 登录页面（邮箱/密码）的额外延迟（秒）
+    ide_ready_delay: float = 5.0  # 工作站页面出现侧边栏元素的延迟（秒）
+    fail_rate: float = 0.0  # HTML页面随机返回500的概率
+    ide_fail_rate: float = 0.0  # 工作站IDE始终不出现侧边栏元素的概率
+    hide_workspace_icon: bool = False  # 模拟页面改版：已登录首页不显示工作区图标
+    jwt_ttl: int = 86400  # 下发的工作站JWT有效期（秒）
+    bundle_count: int = 4  # IDE页面引用的静态脚本数量
+    bundle_kb: int = 256  # 每个静态脚本的大小（KB）
+    password: Optional[str] = None  # 设置后只接受该密码
+    js_auth: bool = False  # 登录重定向改为需要执行JavaScript的页面，HTTP刷新无法跟随
+
+def make_mock_jwt(ttl, prefix="mock-"):
+    """生成模拟的WorkstationJwtPartitioned，aud指向模拟集群"""
+    now = int(time.time())
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+    header = encode({"alg": "none", "typ": "JWT"})
+    payload = encode({
+        "iss": "https://cloud.google.com/workstations",
+        "aud": f"{prefix}{MOCK_CLUSTER}",
+        "iat": now,
+        "exp": now + ttl,
+    })
+    return f"{header}.{payload}.mock"
+
+def is_valid_mock_jwt(value):
+    """校验模拟JWT的签名标记和过期时间"""
+    try:
+        header, payload, signature = value.split(".")
+        data = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return signature == "mock" and data.get("exp", 0) > time.time()
+    except Exception:
+        return False
+
+LANDING_LOGGED_OUT = """<!doctype html><html><head><title>Firebase Studio</title></head><body>
+<div id="nav"><a href="/new" role="link"><span>Get Started</span></a></div>
+<img src="/static/hero.png" width="640" height="320">
+</body></html>"""
+
+LANDING_LOGGED_IN = """<!doctype html><html><head><title>Firebase Studio</title>
+<style>.workspace-icon{display:inline-block;width:48px;height:48px;cursor:pointer}</style></head><body>
+<h1>Your workspaces</h1>
+<div class="workspace-list">%s</div>
+</body></html>"""
+
+WORKSPACE_ENTRY = """<a href="%s"><div class="workspace-icon"><img role="presentation" class="custom-icon"
+ src="/static/workspace-blank-192.png" width="48" height="48"></div><span>firebase-lost</span></a>"""
+
+EMAIL_PAGE = """<!doctype html><html><head><title>Sign in - Google Accounts</title></head><body>
+<h1>Sign in</h1>
+<form method="GET" action="/accounts/signin/challenge/pwd">
+<input type="hidden" name="continue" value="%(continue)s">
+<input type="email" name="identifier" aria-label="Email or phone" autocomplete="username">
+<button type="submit">Next</button>
+</form></body></html>"""
+
+PASSWORD_PAGE = """<!doctype html><html><head><title>Sign in - Google Accounts</title></head><body>
+<h1>Welcome</h1><div>%(email)s</div>
+<form method="POST" action="/accounts/signin/challenge/pwd">
+<input type="hidden" name="continue" value="%(continue)s">
+<input type="password" name="Passwd" aria-label="Enter your password" autocomplete="current-password">
+<button type="submit">Next</button>
+</form></body></html>"""
+
+IDE_PAGE = """<!doctype html><html><head><title>firebase-lost - Code OSS</title>
+<style>.codicon{display:inline-block;width:24px;height:24px}.tab{display:inline-block;padding:4px}</style>
+%(bundles)s
+</head><body>
+<div id="workbench">Loading workspace...</div>
+<script>
+if (%(ready)s) {
+  setTimeout(function () {
+    document.getElementById("workbench").innerHTML =
+      '<div class="activitybar">' +
+      '<a class="action-label codicon codicon-explorer-view-icon" aria-label="Explorer (Ctrl+Shift+E)"></a>' +
+      '<a class="action-label codicon codicon-search-view-icon" aria-label="Search (Ctrl+Shift+F)"></a>' +
+      '<a class="action-label codicon codicon-source-control-view-icon" aria-label="Source Control (Ctrl+Shift+G)"></a>' +
+      '<a class="action-label codicon codicon-run-view-icon" aria-label="Run and Debug (Ctrl+Shift+D)"></a>' +
+      '</div>' +
+      '<div class="tab" aria-label="Web"><span class="tab-label-name">Web</span></div>';
+  }, %(delay_ms)d);
+}
+</script>
+</body></html>"""
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """按路径分发到模拟的IDX、账号登录页和工作站"""
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def log_message(self, format, *args):
+        # 默认不打印每个请求，避免淹没被测流程的日志
+        pass
+
+    def _cookies(self):
+        cookie = SimpleCookie()
+        cookie.load(self.headers.get("Cookie", ""))
+        return {key: morsel.value for key, morsel in cookie.items()}
+
+    def _logged_in(self):
+        return self._cookies().get(SESSION_COOKIE) == SESSION_VALUE
+
+    def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or []):
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _redirect(self, location, headers=None):
+        self._send(302, b"", headers=[("Location", location)] + list(headers or []))
+
+    def _maybe_fail(self):
+        """按配置的概率注入服务器错误"""
+        if self.config.fail_rate and random.random() < self.config.fail_rate:
+            self._send(500, "<h1>500 Internal Server Error (injected)</h1>")
+            return True
+        return False
+
+    def _dispatch(self):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        query = parse_qs(parsed.query)
+        self.server.record(path)
+        time.sleep(self.config.latency)
+
+        if path.startswith("/static/"):
+            return self._static(path)
+        if self._maybe_fail():
+            return
+        if path == "/":
+            return self._landing()
+        if path == "/new":
+            if self._logged_in():
+                return self._redirect("/")
+            return self._redirect("/accounts/signin/identifier?continue=/")
+        if path == "/accounts/" or path == "/accounts":
+            return self._redirect("/accounts/signin/identifier?continue=/")
+        if path == "/accounts/signin/identifier":
+            time.sleep(self.config.login_delay)
+            return self._send(200, EMAIL_PAGE % {"continue": query.get("continue", ["/"])[0]})
+        if path == "/accounts/signin/challenge/pwd":
+            time.sleep(self.config.login_delay)
+            if self.command == "POST":
+                return self._submit_password()
+            return self._send(200, PASSWORD_PAGE % {
+                "email": query.get("identifier", [""])[0],
+                "continue": query.get("continue", ["/"])[0],
+            })
+        if path == "/accounts/ServiceLogin":
+            return self._service_login(query)
+        if path == "/workspace/_auth":
+            return self._workstation_auth(query)
+        if path.startswith("/workspace"):
+            return self._workspace()
+        return self._send(404, "<h1>404 Not Found</h1>")
+
+    def _landing(self):
+        if not self._logged_in():
+            return self._send(200, LANDING_LOGGED_OUT)
+        entries = "" if self.config.hide_workspace_icon else WORKSPACE_ENTRY % self.server.workstation_url
+        return self._send(200, LANDING_LOGGED_IN % entries)
+
+    def _submit_password(self):
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        password = form.get("Passwd", [""])[0]
+        if not password or (self.config.password is not None and password != self.config.password):
+            return self._send(200, PASSWORD_PAGE % {"email": "", "continue": "/"} )
+        return self._redirect(
+            form.get("continue", ["/"])[0] or "/",
+            headers=[("Set-Cookie", f"{SESSION_COOKIE}={SESSION_VALUE}; Path=/; HttpOnly")],
+        )
+
+    def _service_login(self, query):
+        """账号侧的登录检查：已登录时签发一次性票据并跳回工作站，未登录时进入登录页"""
+        continue_url = query.get("continue", [""])[0]
+        if not self._logged_in() or not continue_url:
+            return self._redirect("/accounts/signin/identifier?continue=/")
+        location = f"{continue_url}?ticket={self.server.issue_ticket()}"
+        if self.config.js_auth:
+            # 只能由浏览器执行的跳转
+            return self._send(200, f'<script>location.replace("{location}")</script>')
+        return self._redirect(location)
+
+    def _workstation_auth(self, query):
+        """工作站用票据换取新的JWT cookie"""
+        if not self.server.redeem_ticket(query.get("ticket", [""])[0]):
+            return self._send(401, "<h1>401 Unauthorized</h1>")
+        jwt = make_mock_jwt(self.config.jwt_ttl)
+        return self._redirect("/workspace/", headers=[("Set-Cookie", f"{JWT_COOKIE}={jwt}; Path=/")])
+
+    def _workspace(self):
+        if not is_valid_mock_jwt(self._cookies().get(JWT_COOKIE, "")):
+            continue_url = quote(f"{self.server.workstation_url}_auth", safe="")
+            return self._redirect(f"{self.server.app_url}/accounts/ServiceLogin?continue={continue_url}")
+        bundles = "\n".join(
+            f'<script src="/static/bundle-{index}.js"></script>' for index in range(self.config.bundle_count)
+        )
+        ready = not (self.config.ide_fail_rate and random.random() < self.config.ide_fail_rate)
+        body = IDE_PAGE % {
+            "bundles": bundles,
+            "ready": "true" if ready else "false",
+            "delay_ms": int(self.config.ide_ready_delay * 1000),
+        }
+        return self._send(200, body)
+
+    def _static(self, path):
+        cache = [("Cache-Control", "public, max-age=31536000, immutable")]
+        if path.endswith(".png"):
+            return self._send(200, ICON_PNG, content_type="image/png", headers=cache)
+        if path.startswith("/static/bundle-") and path.endswith(".js"):
+            # 内容固定，便于验证缓存命中
+            name = path.rsplit("/", 1)[-1]
+            body = (f"/* {name} */\n" + "//" + "x" * 1022 + "\n").encode() * self.config.bundle_kb
+            return self._send(200, body, content_type="application/javascript", headers=cache)
+        return self._send(404, "")
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_HEAD(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+class MockIdxServer:
+    """在后台线程中运行的模拟服务器"""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or MockConfig()
+        self._server = ThreadingHTTPServer((host, port), MockRequestHandler)
+        self._server.daemon_threads = True
+        self._server.config = self.config
+        self._server.request_counts = {}
+        self._lock = threading.Lock()
+        self._server.record = self._record
+        self._server.tickets = set()
+        self._server.issue_ticket = self._issue_ticket
+        self._server.redeem_ticket = self._redeem_ticket
+        self._server.app_url = self.base_url
+        self._server.workstation_url = self.workstation_url
+        self._thread = None
+
+    def _issue_ticket(self):
+        ticket = f"t{random.getrandbits(64):x}"
+        with self._lock:
+            self._server.tickets.add(ticket)
+        return ticket
+
+    def _redeem_ticket(self, ticket):
+        with self._lock:
+            if ticket in self._server.tickets:
+                self._server.tickets.discard(ticket)
+                return True
+        return False
+
+    def _record(self, path):
+        with self._lock:
+            self._server.request_counts[path] = self._server.request_counts.get(path, 0) + 1
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def workstation_url(self):
+        """工作站地址：使用localhost，与IDX/账号页面的cookie隔离"""
+        port = self._server.server_address[1]
+        return f"http://localhost:{port}/workspace/"
+
+    @property
+    def request_counts(self):
+        with self._lock:
+            return dict(self._server.request_counts)
+
+    def env(self):
+        """指向本服务器的idx.py环境变量"""
+        return {
+            "APP_URL": self.base_url,
+            "ACCOUNTS_URL": f"{self.base_url}/accounts",
+            "WORKSTATION_URL": self.workstation_url,
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def add_config_arguments(parser):
+    """把MockConfig的字段添加为命令行参数，供本文件和bench.py共用"""
+    parser.add_argument("--latency", type=float, default=MockConfig.latency, help="每个请求的基础延迟（秒）")
+    parser.add_argument("--login-delay", type=float, default=MockConfig.login_delay, help="登录页面的额外延迟（秒）")
+    parser.add_argument("--ide-delay", type=float, default=MockConfig.ide_ready_delay, help="IDE侧边栏出现的延迟（秒）")
+    parser.add_argument("--fail-rate", type=float, default=MockConfig.fail_rate, help="HTML页面随机返回500的概率")
+    parser.add_argument("--ide-fail-rate", type=float, default=MockConfig.ide_fail_rate, help="IDE始终不就绪的概率")
+    parser.add_argument("--hide-icon", action="store_true", help="已登录首页不显示工作区图标")
+    parser.add_argument("--bundle-count", type=int, default=MockConfig.bundle_count, help="IDE静态脚本数量")
+    parser.add_argument("--js-auth", action="store_true", help="登录重定向需要JavaScript，HTTP刷新无法完成")
+    parser.add_argument("--bundle-kb", type=int, default=MockConfig.bundle_kb, help="每个静态脚本的大小（KB）")
+
+def config_from_args(args):
+    return MockConfig(
+        latency=args.latency,
+        login_delay=args.login_delay,
+        ide_ready_delay=args.ide_delay,
+        fail_rate=args.fail_rate,
+        ide_fail_rate=args.ide_fail_rate,
+        hide_workspace_icon=args.hide_icon,
+        bundle_count=args.bundle_count,
+        bundle_kb=args.bundle_kb,
+        js_auth=args.js_auth,
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地模拟IDX/Google账号/工作站服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockIdxServer(config_from_args(args), host=args.host, port=args.port)
+    print(f"模拟服务器已启动: {server.base_url}")
+    for name, value in server.env().items():
+        print(f"  {name}={value}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()